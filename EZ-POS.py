@@ -8,16 +8,46 @@
 import json
 import os
 import csv
+import gzip
+import hashlib
+import io
+import re
+import shutil
+import sys
+from array import array
+from bisect import bisect_right
+from collections.abc import MutableMapping, ItemsView
 from datetime import datetime
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog, filedialog
 
-APP_DIR = os.path.dirname(os.path.abspath(__file__))
+# EZPOS_DATA_DIR points the data files elsewhere (e.g. the benchmarks use a scratch dir)
+APP_DIR = os.environ.get('EZPOS_DATA_DIR') or os.path.dirname(os.path.abspath(__file__))
 USERS_FILE = os.path.join(APP_DIR, 'pos_users.json')
 ITEMS_FILE = os.path.join(APP_DIR, 'pos_items.json')
 TX_LOG    = os.path.join(APP_DIR, 'pos_transactions.csv')
+ITEM_NAMES_FILE = os.path.join(APP_DIR, 'pos_item_names.csv')
+STOCK_FILE = os.path.join(APP_DIR, 'pos_stock.json')
+STOCK_LOG  = os.path.join(APP_DIR, 'pos_stock_log.csv')
+BARCODES_FILE = os.path.join(APP_DIR, 'pos_barcodes.json')
+TX_SEGMENT_DIR = os.path.join(APP_DIR, 'pos_tx_segments')   # sealed, gzipped pieces of TX_LOG
+TX_MANIFEST = os.path.join(APP_DIR, 'pos_tx_manifest.json')
 
 TAX_RATE = 0.0825  # fixed tax inside the program (8.25%). Change as needed.
+LOW_STOCK_DEFAULT = 5      # alert when on-hand drops to this, unless set per item
+STOCK_FLUSH_SALES = 25     # write stock counts to disk after this many sales...
+STOCK_FLUSH_MS = 60000     # ...or at least this often (milliseconds)
+TX_ROTATE_DAILY = True            # start a new log segment each day...
+TX_ROTATE_BYTES = 50 * 1024 * 1024  # ...or once the live log reaches this size
+
+# In-store labels (deli, produce): GTIN-13 starting with one of these prefixes,
+# then a 5-digit item number, a 5-digit value and the check digit.
+# 'price' values are cents; 'weight' values are grams, charged at the item's price per kg.
+EMBEDDED_PREFIXES = {
+    '02': 'price',
+    '20': 'price', '21': 'price', '22': 'price', '23': 'weight', '24': 'weight',
+    '25': 'price', '26': 'price', '27': 'price', '28': 'weight', '29': 'weight',
+}
 
 # --------------------- data helpers ---------------------
 def load_json(path, default):
@@ -33,7 +63,339 @@ def load_json(path, default):
 
 def save_json(path, data):
     with open(path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2)
+        if isinstance(data, ItemCatalog):
+            data.dump(f)
+        else:
+            json.dump(data, f, indent=2)
+
+def load_item_names(path):
+    """Read the item name journal: one sku,ver,name record per name version.
+
+    Sales rows refer to these versions, so a damaged journal stops the app
+    rather than being reset (which would point old sales at the wrong names).
+    """
+    names = {}
+    if not os.path.exists(path):
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerow(['sku','ver','name'])
+        return names
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data and not data.endswith(b'\n'):
+        # a record cut short by a crash; no sale was written after it, so drop it
+        data = data[:data.rfind(b'\n') + 1]
+        with open(path, 'r+b') as f:
+            f.truncate(len(data))
+    rows = csv.reader(io.StringIO(data.decode('utf-8'), newline=''))
+    if next(rows, None) != ['sku','ver','name']:
+        raise ValueError(f'{path} is not an item name journal')
+    for n, row in enumerate(rows, start=2):
+        versions = names.setdefault(row[0], []) if len(row) == 3 else None
+        if versions is None or row[1] != str(len(versions)):
+            raise ValueError(f'{path} line {n} is damaged: {row}')
+        versions.append(row[2])
+    return names
+
+def append_item_names(path, records):
+    """Append (sku, ver, name) records and get them onto the disk."""
+    with open(path, 'a', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerows(records)
+        f.flush()
+        os.fsync(f.fileno())
+
+_WS = re.compile(r'[ \t\r\n]*')
+
+def iter_json_object(f, chunk=1 << 20):
+    """Yield the (key, value) pairs of the top-level JSON object in file f,
+    reading it in chunks so the whole document is never in memory at once."""
+    scan = json.JSONDecoder().scan_once
+    ws = _WS.match
+    buf, pos, eof, need_more, opened = '', 0, False, True, False
+    while True:
+        # keep plenty of lookahead so an entry is almost always complete in buf
+        if need_more or (not eof and len(buf) - pos < 65536):
+            if eof:
+                raise ValueError('JSON object ends too early')
+            data = f.read(chunk)
+            eof = not data
+            buf, pos, need_more = buf[pos:] + data, 0, False
+        start = pos
+        try:
+            pos = ws(buf, pos).end()
+            if not opened:
+                if buf[pos] != '{':
+                    raise ValueError('Expected a JSON object')
+                pos = ws(buf, pos + 1).end()
+                if buf[pos] == '}':
+                    sep = '}'
+                    pos += 1
+                    break
+            key, pos = scan(buf, pos)
+            pos = ws(buf, pos).end()
+            if buf[pos] != ':' or not isinstance(key, str):
+                raise ValueError('Malformed JSON object')
+            value, pos = scan(buf, ws(buf, pos + 1).end())
+            pos = ws(buf, pos).end()
+            sep = buf[pos]
+            pos += 1
+            if sep not in ',}':
+                if eof:
+                    raise ValueError('Malformed JSON object')
+                raise IndexError  # a number cut off by the end of buf, e.g. "1." of "1.5"
+        except (IndexError, StopIteration, json.JSONDecodeError):
+            # ran off the end of buf (or bad JSON, which shows up once eof is reached)
+            pos, need_more = start, True
+            continue
+        opened = True
+        yield key, value
+        if sep == '}':
+            break
+    if (buf[pos:] + f.read()).strip():
+        raise ValueError('Extra data after JSON object')
+
+def load_items(path, default):
+    """load_json for the catalog: streams pos_items.json row by row into an
+    ItemCatalog instead of building a dict of dicts first.
+
+    default is only used when the file does not exist. A damaged file or a
+    bad item stops the app; falling back to the defaults would let the next
+    edit in Items admin overwrite the real catalog.
+    """
+    if not os.path.exists(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(default, f, indent=2)
+        return ItemCatalog(default)
+    catalog = ItemCatalog()
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for sku, item in iter_json_object(f):
+                try:
+                    catalog[sku] = item
+                except (TypeError, KeyError, ValueError, OverflowError) as e:
+                    raise ValueError(f'item {sku}: {e!r}') from None
+    except ValueError as e:
+        raise ValueError(f'{path} is damaged ({e}); fix it or restore it from backup') from None
+    return catalog
+
+_EMPTY, _GONE = -1, -2  # ItemCatalog hash table markers
+
+class ItemCatalog(MutableMapping):
+    """The item catalog (ITEMS), stored column-wise to keep memory per SKU small.
+
+    SKUs and names are UTF-8 in two shared buffers addressed by offset arrays,
+    prices are integer cents in an array, and SKU -> row is an open-addressing
+    hash table that is itself an array. No Python object is kept per item.
+    ITEMS[sku] returns a fresh {'name', 'price'} dict, so it reads like the old
+    dict of dicts; write back with ITEMS[sku] = {...} or del ITEMS[sku].
+    Iteration follows insertion order, like a dict.
+    """
+    def __init__(self, items=()):
+        self._clear()
+        self.update(items)
+
+    def _clear(self):
+        self._skus = bytearray()
+        self._sku_end = array('i')     # row -> end of its SKU in _skus (start = previous row's end)
+        self._names = bytearray()
+        self._name_at = array('i')     # row -> start of its name in _names
+        self._name_len = array('i')    # row -> name length; -1 marks a deleted row
+        self._cents = array('i')
+        self._table = array('i', [_EMPTY]) * 8
+        self._live = 0
+        self._used_slots = 0           # live rows + _GONE markers in _table
+        self._garbage = 0              # bytes of _names no longer referenced
+        self._by_offset = None         # (name starts, rows) sorted by start, for find(); built on demand
+
+    def _sku_bytes(self, row):
+        start = self._sku_end[row - 1] if row else 0
+        return self._skus[start:self._sku_end[row]]
+
+    def _name(self, row):
+        at = self._name_at[row]
+        return self._names[at:at + self._name_len[row]].decode('utf-8')
+
+    def _find(self, key):
+        """Return (slot, row) for an encoded SKU; row is -1 and slot is where
+        it would go if the SKU is not present."""
+        table, ends, skus = self._table, self._sku_end, self._skus
+        mask = len(table) - 1
+        slot = hash(key) & mask
+        free = -1
+        while True:
+            row = table[slot]
+            if row >= 0:
+                end = ends[row]
+                if end - (ends[row - 1] if row else 0) == len(key) and skus[end - len(key):end] == key:
+                    return slot, row
+            elif row == _EMPTY:
+                return (slot if free < 0 else free), -1
+            elif free < 0:
+                free = slot
+            slot = (slot + 1) & mask
+
+    def _rehash(self):
+        size = 8
+        while size < self._live * 3:
+            size *= 2
+        self._table = array('i', [_EMPTY]) * size
+        self._used_slots = 0
+        for row in range(len(self._sku_end)):
+            if self._name_len[row] >= 0:
+                slot, _ = self._find(bytes(self._sku_bytes(row)))
+                self._table[slot] = row
+                self._used_slots += 1
+
+    def _compact(self):
+        live = list(self.items())
+        self._clear()
+        self.update(live)
+
+    def __len__(self):
+        return self._live
+
+    def __contains__(self, sku):
+        return isinstance(sku, str) and self._find(sku.encode('utf-8'))[1] >= 0
+
+    def __getitem__(self, sku):
+        row = self._find(sku.encode('utf-8'))[1] if isinstance(sku, str) else -1
+        if row < 0:
+            raise KeyError(sku)
+        return {'name': self._name(row), 'price': self._cents[row] / 100}
+
+    def __setitem__(self, sku, item):
+        key = sku.encode('utf-8')
+        name = str(item['name']).encode('utf-8')
+        cents = round(float(item['price']) * 100)
+        if not -2**31 <= cents < 2**31:
+            raise ValueError(f"Price {item['price']} is out of range")
+        slot, row = self._find(key)
+        if row >= 0:
+            if self._names[self._name_at[row]:self._name_at[row] + self._name_len[row]] != name:
+                self._garbage += self._name_len[row]
+                self._by_offset = None
+                self._name_at[row] = len(self._names)
+                self._name_len[row] = len(name)
+                self._names += name
+            self._cents[row] = cents
+            if self._garbage > 65536 and self._garbage * 2 > len(self._names):
+                self._compact()
+            return
+        row = len(self._sku_end)
+        self._skus += key
+        self._sku_end.append(len(self._skus))
+        self._name_at.append(len(self._names))
+        self._name_len.append(len(name))
+        if self._by_offset is not None and name:
+            self._by_offset[0].append(len(self._names))
+            self._by_offset[1].append(row)
+        self._names += name
+        self._cents.append(cents)
+        if self._table[slot] == _EMPTY:
+            self._used_slots += 1
+        self._table[slot] = row
+        self._live += 1
+        if self._used_slots * 2 > len(self._table):
+            self._rehash()
+
+    def __delitem__(self, sku):
+        slot, row = self._find(sku.encode('utf-8')) if isinstance(sku, str) else (-1, -1)
+        if row < 0:
+            raise KeyError(sku)
+        self._table[slot] = _GONE
+        self._garbage += self._name_len[row]
+        self._by_offset = None
+        self._name_len[row] = -1
+        self._live -= 1
+        dead = len(self._sku_end) - self._live
+        if dead > 1024 and dead * 2 > len(self._sku_end):
+            self._compact()
+
+    def _rows(self):
+        """Yield (sku, row) for live rows in order."""
+        start = 0
+        skus, ends, lens = self._skus, self._sku_end, self._name_len
+        for row in range(len(ends)):
+            end = ends[row]
+            if lens[row] >= 0:
+                yield skus[start:end].decode('utf-8'), row
+            start = end
+
+    def __iter__(self):
+        for sku, _ in self._rows():
+            yield sku
+
+    def items(self):
+        return _CatalogItems(self)
+
+    def clear(self):
+        self._clear()
+
+    def find(self, q):
+        """Yield (sku, item) for items whose lowercased name contains q."""
+        if not q:
+            yield from self.items()
+            return
+        if not q.isascii():
+            for sku, row in self._rows():
+                name = self._name(row)
+                if q in name.lower():
+                    yield sku, {'name': name, 'price': self._cents[row] / 100}
+            return
+        # ASCII query: search one lowercased copy of the name buffer and map
+        # each hit back to its row, so the cost follows the number of matches
+        if self._by_offset is None:
+            rows = sorted((r for r in range(len(self._name_at)) if self._name_len[r] > 0),
+                          key=self._name_at.__getitem__)
+            self._by_offset = (array('i', (self._name_at[r] for r in rows)), array('i', rows))
+        starts, rows = self._by_offset
+        needle = q.encode('ascii')
+        lowered = self._names.lower()
+        hits = []
+        pos = lowered.find(needle)
+        while pos >= 0:
+            i = bisect_right(starts, pos) - 1
+            if i >= 0:
+                row = rows[i]
+                name_end = starts[i] + self._name_len[row]
+                if pos + len(needle) <= name_end:
+                    hits.append(row)
+                    pos = lowered.find(needle, name_end)
+                    continue
+            pos = lowered.find(needle, pos + 1)
+        for row in sorted(hits):
+            yield self._sku_bytes(row).decode('utf-8'), {'name': self._name(row), 'price': self._cents[row] / 100}
+
+    def dump(self, f):
+        """Write the catalog in the same JSON layout as json.dump(dict, indent=2)."""
+        if not self._live:
+            f.write('{}')
+            return
+        f.write('{')
+        sep = '\n'
+        for sku, row in self._rows():
+            f.write('{}  {}: {{\n    "name": {},\n    "price": {!r}\n  }}'.format(
+                sep, json.dumps(sku), json.dumps(self._name(row)), self._cents[row] / 100))
+            sep = ',\n'
+        f.write('\n}')
+
+    def __sizeof__(self):
+        return (object.__sizeof__(self) + sum(sys.getsizeof(buf) for buf in (
+            self._skus, self._sku_end, self._names, self._name_at, self._name_len, self._cents, self._table)))
+
+class _CatalogItems(ItemsView):
+    def __iter__(self):
+        cat = self._mapping
+        for sku, row in cat._rows():
+            yield sku, {'name': cat._name(row), 'price': cat._cents[row] / 100}
+
+def parse_price(text):
+    """Dollars as typed in Items admin -> float. Raises ValueError unless it
+    is whole cents within what ItemCatalog stores (below $21,474,836.48)."""
+    cents = float(text) * 100
+    # nan and inf fail the range test
+    if not -2**31 <= cents < 2**31 - 0.5 or abs(cents - round(cents)) > 1e-6:
+        raise ValueError(f'{text} is not a price in dollars and cents')
+    return round(cents) / 100
 
 # Bootstrap minimal data on first run
 DEFAULT_USERS = {
@@ -46,14 +408,261 @@ DEFAULT_ITEMS = {
 }
 
 USERS = load_json(USERS_FILE, DEFAULT_USERS)
-ITEMS = load_json(ITEMS_FILE, DEFAULT_ITEMS)
+ITEMS = load_items(ITEMS_FILE, DEFAULT_ITEMS)
+ITEM_NAMES = load_item_names(ITEM_NAMES_FILE)  # sku: [name as of version 0, 1, ...]
+BARCODES = load_json(BARCODES_FILE, {})      # normalized code: sku
+
+TX_HEADER = ['timestamp','cashier_id','cashier_name','payment_type','card_txn','subtotal','tax','total','lines_json']
 
 if not os.path.exists(TX_LOG):
     with open(TX_LOG, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(TX_HEADER)
+
+if not os.path.exists(STOCK_LOG):
+    with open(STOCK_LOG, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['timestamp','user_id','sku','kind','delta','on_hand','note'])
+
+# --------------------- transaction log lines ---------------------
+# Old rows store the cart as a JSON list of {sku, name, price, qty}.
+# New rows use a compact form:  v2|sku:ver:qty:cents|sku:ver:qty:cents...
+# where ver points into ITEM_NAMES[sku], so each item name is written once
+# per rename instead of on every line of every sale.
+LINES_V2 = 'v2'
+
+def _name_version(sku, name, new_records):
+    versions = ITEM_NAMES.get(sku, [])
+    try:
+        return versions.index(name)
+    except ValueError:
+        # maybe already queued by an earlier line of this cart
+        for rec in new_records:
+            if rec[0] == sku and rec[2] == name:
+                return rec[1]
+        ver = len(versions) + sum(1 for rec in new_records if rec[0] == sku)
+        new_records.append((sku, ver, name))
+        return ver
+
+def encode_lines(lines):
+    # lines that can't be packed losslessly keep the old JSON form
+    for l in lines:
+        if '|' in l['sku'] or abs(round(l['price'] * 100) - l['price'] * 100) > 1e-6:
+            return json.dumps(lines)
+    parts = [LINES_V2]
+    new_records = []
+    for l in lines:
+        ver = _name_version(l['sku'], l['name'], new_records)
+        parts.append(f"{l['sku']}:{ver}:{l['qty']}:{round(l['price'] * 100)}")
+    if new_records:
+        # names must be on disk before the row that refers to them
+        append_item_names(ITEM_NAMES_FILE, new_records)
+        for sku, ver, name in new_records:
+            ITEM_NAMES.setdefault(sku, []).append(name)
+    return '|'.join(parts)
+
+def decode_lines(raw):
+    """Read the lines_json column of either format back into cart lines."""
+    if not raw.startswith(LINES_V2):
+        return json.loads(raw)
+    lines = []
+    for part in raw.split('|')[1:]:
+        sku, ver, qty, cents = part.rsplit(':', 3)
+        versions = ITEM_NAMES.get(sku)
+        ver = int(ver)
+        name = versions[ver] if versions and ver < len(versions) else sku
+        lines.append({'sku': sku, 'name': name, 'price': int(cents) / 100, 'qty': int(qty)})
+    return lines
+
+# --------------------- transaction log segments ---------------------
+# TX_LOG only holds the current day (or up to TX_ROTATE_BYTES). Older sales
+# are sealed into gzipped segments in TX_SEGMENT_DIR; TX_MANIFEST lists them
+# oldest first with their time range, row count and sha256. Readers go
+# through iter_tx_rows, which presents segments + TX_LOG as one log.
+_tx_first_day = None  # date of the first row in TX_LOG; '' when it has no rows yet
+
+def _active_first_day():
+    global _tx_first_day
+    if _tx_first_day is None:
+        with open(TX_LOG, 'r', encoding='utf-8') as f:
+            f.readline()
+            _tx_first_day = f.readline()[:10]
+    return _tx_first_day
+
+def tx_rotation_due():
+    if os.path.getsize(TX_LOG) >= TX_ROTATE_BYTES:
+        return True
+    day = _active_first_day()
+    return TX_ROTATE_DAILY and bool(day) and day < datetime.now().date().isoformat()
+
+def _scan_active_log():
+    rows, first, last = 0, None, None
+    with open(TX_LOG, 'r', newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            rows += 1
+            first = first or row['timestamp']
+            last = row['timestamp']
+    return rows, first, last
+
+def _reset_active_log():
+    global _tx_first_day
+    with open(TX_LOG, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerow(TX_HEADER)
+    _tx_first_day = ''
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def load_tx_manifest():
+    """Read TX_MANIFEST; [] if nothing has been sealed yet.
+
+    The manifest is the only record of the sealed sales, so a damaged one
+    stops the app rather than being treated as empty (which would hide that
+    history and let a new segment take an old one's name).
+    """
+    if not os.path.exists(TX_MANIFEST):
+        return []
+    try:
+        with open(TX_MANIFEST, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except ValueError as e:
+        raise ValueError(f'{TX_MANIFEST} is damaged ({e}); restore it from backup') from None
+    fields = {'file', 'first', 'last', 'rows', 'sha256'}
+    if not (isinstance(manifest, list) and all(isinstance(seg, dict) and fields <= seg.keys() for seg in manifest)):
+        raise ValueError(f'{TX_MANIFEST} is damaged; restore it from backup')
+    return manifest
+
+def rotate_tx_log():
+    """Seal the current TX_LOG into a compressed segment and start an empty one."""
+    rows, first, last = _scan_active_log()
+    if not rows:
+        return
+    os.makedirs(TX_SEGMENT_DIR, exist_ok=True)
+    manifest = load_tx_manifest()
+    # never reuse a name: a file may be there from a rotation that stopped
+    # before the manifest was written
+    n = len(manifest) + 1
+    while True:
+        name = 'tx-{}-{:04d}.csv.gz'.format(first[:10].replace('-', ''), n)
+        path = os.path.join(TX_SEGMENT_DIR, name)
+        if not os.path.exists(path):
+            break
+        n += 1
+    with open(TX_LOG, 'rb') as src, gzip.open(path + '.tmp', 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    os.replace(path + '.tmp', path)
+    manifest.append({
+        'file': name, 'first': first, 'last': last, 'rows': rows,
+        'bytes': os.path.getsize(path), 'sha256': _sha256(path),
+        'source_bytes': os.path.getsize(TX_LOG),
+    })
+    with open(TX_MANIFEST + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(TX_MANIFEST + '.tmp', TX_MANIFEST)
+    _reset_active_log()
+
+def finish_rotation():
+    """If we stopped between recording a segment and emptying TX_LOG, empty it now."""
+    manifest = load_tx_manifest()
+    if not manifest or manifest[-1].get('source_bytes') != os.path.getsize(TX_LOG):
+        return
+    rows, first, last = _scan_active_log()
+    seg = manifest[-1]
+    if (rows, first, last) == (seg['rows'], seg['first'], seg['last']):
+        _reset_active_log()
+
+def _open_segment(seg):
+    path = os.path.join(TX_SEGMENT_DIR, seg['file'])
+    with open(path, 'rb') as f:
+        data = f.read()
+    if hashlib.sha256(data).hexdigest() != seg['sha256']:
+        raise ValueError(f"Log segment {seg['file']} is damaged (checksum mismatch)")
+    return io.TextIOWrapper(gzip.GzipFile(fileobj=io.BytesIO(data)), encoding='utf-8', newline='')
+
+def iter_tx_rows(start=None, end=None, skip_rows=0):
+    """Yield every sale as a row dict, oldest first, across segments and TX_LOG.
+
+    start/end are inclusive ISO timestamps or dates; segments entirely outside
+    the range are not opened. skip_rows drops rows from the front, skipping
+    whole segments where it can.
+    """
+    if end is not None and len(end) == 10:
+        end += 'T23:59:59'
+    for seg in load_tx_manifest():
+        if skip_rows >= seg['rows']:
+            skip_rows -= seg['rows']
+            continue
+        if (start and seg['last'] < start) or (end and seg['first'] > end):
+            skip_rows = 0
+            continue
+        with _open_segment(seg) as f:
+            yield from _filter_rows(csv.DictReader(f), start, end, skip_rows)
+        skip_rows = 0
+    with open(TX_LOG, 'r', newline='', encoding='utf-8') as f:
+        yield from _filter_rows(csv.DictReader(f), start, end, skip_rows)
+
+def _filter_rows(reader, start, end, skip_rows):
+    for row in reader:
+        if skip_rows:
+            skip_rows -= 1
+            continue
+        ts = row['timestamp']
+        if (start and ts < start) or (end and ts > end):
+            continue
+        yield row
+
+def tx_row_count():
+    return sum(seg['rows'] for seg in load_tx_manifest()) + _scan_active_log()[0]
+
+def append_tx(cashier_id, cashier_name, payment_type, card_txn, cart):
+    global _tx_first_day
+    if tx_rotation_due():
+        try:
+            rotate_tx_log()
+        except (OSError, ValueError):
+            pass  # never lose a sale over rotation; the live log just grows until it works
+    now = datetime.now()
+    with open(TX_LOG, 'a', newline='', encoding='utf-8') as f:
         writer = csv.writer(f)
         writer.writerow([
-            'timestamp','cashier_id','cashier_name','payment_type','card_txn','subtotal','tax','total','lines_json'
+            now.isoformat(timespec='seconds'),
+            cashier_id,
+            cashier_name,
+            payment_type,
+            card_txn,
+            f"{cart.subtotal():.2f}",
+            f"{cart.tax():.2f}",
+            f"{cart.total():.2f}",
+            encode_lines(cart.lines)
         ])
+    if not _tx_first_day:
+        _tx_first_day = now.date().isoformat()
+
+def write_audit(path, start=None, end=None):
+    """Write the readable audit report for the sales log to path, one sale at a time."""
+    with open(path, 'w', encoding='utf-8') as out:
+        first = True
+        for row in iter_tx_rows(start, end):
+            lines = decode_lines(row['lines_json'])
+            out_lines = [] if first else ['']
+            first = False
+            out_lines.append('=' * 50)
+            out_lines.append("Time: {}".format(row['timestamp']))
+            out_lines.append("Cashier: {} ({})".format(row['cashier_name'], row['cashier_id']))
+            out_lines.append("Payment: {}  CardTxn: {}".format(row['payment_type'].upper(), row['card_txn']))
+            out_lines.append('Items:')
+            for l in lines:
+                out_lines.append("  - {} x {} @ ${:.2f}".format(l['qty'], l['name'], l['price']))
+            out_lines.append("Subtotal: ${}  Tax: ${}  Total: ${}".format(row['subtotal'], row['tax'], row['total']))
+            out.write("\n".join(out_lines) + "\n")
+
+finish_rotation()
+if tx_rotation_due():
+    rotate_tx_log()
 
 # --------------------- domain logic ---------------------
 class Cart:
@@ -63,7 +672,8 @@ class Cart:
     def add(self, sku, name, price, qty=1):
         # if already in cart, increase qty
         for line in self.lines:
-            if line['sku'] == sku:
+            # price-embedded labels for the same SKU stay separate lines
+            if line['sku'] == sku and line['price'] == float(price):
                 line['qty'] += qty
                 return
         self.lines.append({'sku': sku, 'name': name, 'price': float(price), 'qty': int(qty)})
@@ -88,6 +698,218 @@ class Cart:
     def total(self):
         return round(self.subtotal() + self.tax(), 2)
 
+class Inventory:
+    """On-hand counts kept in memory and written to STOCK_FILE in batches.
+
+    Only SKUs that have been received or counted are tracked. STOCK_FILE also
+    records how many TX_LOG and STOCK_LOG rows its counts include (log_rows,
+    stock_rows), so after a crash reconcile() replays just the entries that
+    never got flushed. Receiving and adjustments are rare, so they are
+    written straight away.
+    """
+    def __init__(self, path):
+        self.path = path
+        data = load_json(path, {'on_hand': {}, 'low': {}, 'log_rows': 0, 'stock_rows': 0})
+        self.on_hand = data.get('on_hand', {})
+        self.low = data.get('low', {})   # per-SKU alert thresholds
+        self.log_rows = data.get('log_rows', 0)
+        self.stock_rows = data.get('stock_rows', 0)
+        self.pending = 0                 # sales not yet on disk
+        self.low_skus = {sku for sku in self.on_hand if self.is_low(sku)}
+
+    def threshold(self, sku):
+        return self.low.get(sku, LOW_STOCK_DEFAULT)
+
+    def is_low(self, sku):
+        return sku in self.on_hand and self.on_hand[sku] <= self.threshold(sku)
+
+    def _apply(self, sku, delta):
+        self.on_hand[sku] += delta
+        if self.is_low(sku):
+            self.low_skus.add(sku)
+        else:
+            self.low_skus.discard(sku)
+
+    def sell(self, lines):
+        """Take a sale already written to TX_LOG off the counts.
+        Returns the SKUs that just dropped to their low-stock threshold."""
+        went_low = []
+        for l in lines:
+            sku = l['sku']
+            if sku not in self.on_hand:
+                continue
+            was_low = sku in self.low_skus
+            self._apply(sku, -l['qty'])
+            if not was_low and sku in self.low_skus:
+                went_low.append(sku)
+        self.log_rows += 1
+        self.pending += 1
+        if self.pending >= STOCK_FLUSH_SALES:
+            self.flush()
+        return went_low
+
+    def receive(self, sku, qty, user_id, note=''):
+        self._journal(sku, 'receive', qty, user_id, note)
+
+    def adjust(self, sku, delta, user_id, note=''):
+        self._journal(sku, 'adjust', delta, user_id, note)
+
+    def set_low(self, sku, threshold):
+        self.low[sku] = int(threshold)
+        if sku in self.on_hand:
+            self._apply(sku, 0)
+        self.flush()
+
+    def _journal(self, sku, kind, delta, user_id, note):
+        # STOCK_LOG first: if we stop before the flush, reconcile() replays it
+        delta = int(delta)
+        with open(STOCK_LOG, 'a', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerow([
+                datetime.now().isoformat(timespec='seconds'), user_id, sku, kind,
+                delta, self.on_hand.get(sku, 0) + delta, note
+            ])
+        self.on_hand.setdefault(sku, 0)
+        self._apply(sku, delta)
+        self.stock_rows += 1
+        self.flush()
+
+    def flush(self):
+        data = {'on_hand': self.on_hand, 'low': self.low,
+                'log_rows': self.log_rows, 'stock_rows': self.stock_rows}
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, self.path)  # never leave a half-written stock file
+        self.pending = 0
+
+    def reconcile(self):
+        """Replay receipts, adjustments and sales logged after the last flush
+        (e.g. after a crash)."""
+        changed = False
+        with open(STOCK_LOG, 'r', newline='', encoding='utf-8') as f:
+            entries = list(csv.DictReader(f))
+        for row in entries[self.stock_rows:]:
+            self.on_hand.setdefault(row['sku'], 0)
+            self._apply(row['sku'], int(row['delta']))
+        if len(entries) != self.stock_rows:
+            self.stock_rows = len(entries)
+            changed = True
+
+        rows = tx_row_count()
+        if rows > self.log_rows:
+            for row in iter_tx_rows(skip_rows=self.log_rows):
+                for l in decode_lines(row['lines_json']):
+                    if l['sku'] in self.on_hand:
+                        self._apply(l['sku'], -l['qty'])
+        if rows != self.log_rows:
+            self.log_rows = rows
+            changed = True
+        if changed:
+            self.flush()
+
+INVENTORY = Inventory(STOCK_FILE)
+INVENTORY.reconcile()
+
+# --------------------- barcodes ---------------------
+def gtin_check_digit(body):
+    total = sum(int(d) * (3 if i % 2 == 0 else 1) for i, d in enumerate(reversed(body)))
+    return str((10 - total % 10) % 10)
+
+def parse_code(code):
+    """Normalize a scanned code. Returns (key, embedded):
+    - UPC-A / EAN-13 / EAN-8 / GTIN-14 -> the 14-digit GTIN, so every scanner format matches
+    - in-store labels -> 'label:' + prefix + item number, embedded = (mode, value)
+    - anything else (PLU, internal codes) -> the code as typed
+    key is None if a GTIN-length code fails its check digit (misread).
+    """
+    code = code.strip()
+    if not (code.isdigit() and len(code) in (8, 12, 13, 14)):
+        return code, None
+    if gtin_check_digit(code[:-1]) != code[-1]:
+        return None, None
+    gtin = code.zfill(14)
+    mode = EMBEDDED_PREFIXES.get(gtin[1:3]) if gtin[0] == '0' else None
+    if mode:
+        return 'label:' + gtin[1:8], (mode, int(gtin[8:13]))
+    return gtin, None
+
+def gtin_forms(key):
+    """The ways a normalized GTIN may be written as a SKU: GTIN-14, EAN-13, UPC-A, EAN-8."""
+    yield key
+    for zeros in (1, 2, 6):
+        if key.startswith('0' * zeros):
+            yield key[zeros:]
+
+class BarcodeIndex:
+    """Maps normalized codes to SKUs for the aliases saved in BARCODES_FILE.
+
+    SKUs that are themselves barcodes need no entry: resolve() looks their
+    GTIN forms up in ITEMS directly. Call remove_sku when an item is deleted.
+    """
+    def __init__(self, aliases):
+        self.aliases = aliases
+        self.index = {}
+        self.by_sku = {}  # sku -> set of keys pointing at it
+        for key, sku in aliases.items():
+            self._link(key, sku)
+
+    def _link(self, key, sku):
+        old = self.index.get(key)
+        if old is not None and old != sku:
+            self.by_sku[old].discard(key)
+        self.index[key] = sku
+        self.by_sku.setdefault(sku, set()).add(key)
+
+    def remove_sku(self, sku):
+        changed = False
+        for key in self.by_sku.pop(sku, ()):
+            self.index.pop(key, None)
+            if self.aliases.pop(key, None) is not None:
+                changed = True
+        if changed:
+            save_json(BARCODES_FILE, self.aliases)
+
+    def add_alias(self, code, sku):
+        key, _ = parse_code(code)
+        if key is None:
+            raise ValueError(f'{code} has a bad check digit')
+        self.aliases[key] = sku
+        self._link(key, sku)
+        save_json(BARCODES_FILE, self.aliases)
+
+    def codes_for(self, sku):
+        return sorted(self.by_sku.get(sku, ()))
+
+    def resolve(self, code):
+        """Return (sku, price) for a scan, or (None, None).
+        price is None unless the label carries its own price or weight."""
+        code = code.strip()
+        if code in ITEMS:
+            return code, None
+        key, embedded = parse_code(code)
+        if key is None:
+            return None, None
+        sku = self.index.get(key)
+        if sku is None and embedded is None and len(key) == 14:
+            sku = next((form for form in gtin_forms(key) if form in ITEMS), None)
+        if sku is None or sku not in ITEMS:
+            return None, None
+        if embedded is None:
+            return sku, None
+        mode, value = embedded
+        if mode == 'price':
+            return sku, value / 100
+        return sku, round(ITEMS[sku]['price'] * value / 1000, 2)
+
+BARCODE_INDEX = BarcodeIndex(BARCODES)
+
+def filter_items(q):
+    """Yield (sku, item) for items whose name contains q (lowercased); all items if q is empty."""
+    if not q:
+        yield from ITEMS.items()
+        return
+    yield from ITEMS.find(q)
+
 # --------------------- UI: App Shell ---------------------
 class POSApp(tk.Tk):
     def __init__(self):
@@ -128,6 +950,8 @@ class POSApp(tk.Tk):
         self.active_user_id = None
         self.active_user = None
         self.cart = Cart()
+        self.protocol('WM_DELETE_WINDOW', self.on_close)
+        self.after(STOCK_FLUSH_MS, self.flush_stock)
         self.show_login()
 
     # ---------- Screens ----------
@@ -148,6 +972,16 @@ class POSApp(tk.Tk):
         for w in self.winfo_children():
             w.destroy()
 
+    def flush_stock(self):
+        if INVENTORY.pending:
+            INVENTORY.flush()
+        self.after(STOCK_FLUSH_MS, self.flush_stock)
+
+    def on_close(self):
+        if INVENTORY.pending:
+            INVENTORY.flush()
+        self.destroy()
+
 # --------------------- UI: Login ---------------------
 class LoginFrame(ttk.Frame):
     """Touch-friendly login with on-screen numeric keypad.
@@ -249,6 +1083,9 @@ class MainPOSFrame(ttk.Frame):
         top.pack(fill='x', pady=6, padx=8)
         ttk.Label(top, text=f"Logged in: {self.app.active_user.get('name')} ({self.app.active_user_id})").pack(side='left')
         ttk.Button(top, text='Sign out', command=self.sign_out).pack(side='right')
+        # low-stock alert: a label, so it never interrupts the cashier
+        self.low_var = tk.StringVar()
+        ttk.Label(top, textvariable=self.low_var, foreground='#f59e0b').pack(side='right', padx=12)
 
         # main area split
         body = ttk.Frame(self)
@@ -307,6 +1144,8 @@ class MainPOSFrame(ttk.Frame):
         self.app.active_user = None
         self.app.active_user_id = None
         self.app.cart.clear()
+        if INVENTORY.pending:
+            INVENTORY.flush()
         self.app.show_login()
 
     def refresh_list(self):
@@ -314,16 +1153,28 @@ class MainPOSFrame(ttk.Frame):
         for line in self.app.cart.lines:
             self.listbox.insert(tk.END, f"{line['qty']} x {line['name']:<20} @ ${line['price']:.2f}")
         self.total_var.set(f"Total: ${self.app.cart.total():.2f}")
+        self.refresh_low_stock()
+
+    def refresh_low_stock(self, just_low=()):
+        # SKUs that just went low come first so the newest alert is visible
+        low = list(just_low) + sorted(INVENTORY.low_skus.difference(just_low))
+        if not low:
+            self.low_var.set('')
+            return
+        names = [f"{ITEMS[sku]['name'] if sku in ITEMS else sku} ({INVENTORY.on_hand[sku]})" for sku in low[:3]]
+        more = f" +{len(low) - 3} more" if len(low) > 3 else ''
+        self.low_var.set('Low stock: ' + ', '.join(names) + more)
 
     def add_by_sku(self):
-        sku = self.sku_var.get().strip()
-        if not sku:
+        code = self.sku_var.get().strip()
+        if not code:
             return
-        item = ITEMS.get(sku)
-        if not item:
-            messagebox.showerror('Not found', f'SKU {sku} not in system')
+        sku, price = BARCODE_INDEX.resolve(code)
+        if not sku:
+            messagebox.showerror('Not found', f'SKU {code} not in system')
         else:
-            self.app.cart.add(sku, item['name'], item['price'], qty=1)
+            item = ITEMS[sku]
+            self.app.cart.add(sku, item['name'], item['price'] if price is None else price, qty=1)
             self.refresh_list()
         self.sku_var.set('')
 
@@ -378,9 +1229,12 @@ class MainPOSFrame(ttk.Frame):
         except Exception:
             pass
 
-    def on_sale_done(self):
+    def on_sale_done(self, went_low=()):
         self.app.cart.clear()
         self.refresh_list()
+        if went_low:
+            self.refresh_low_stock(went_low)
+            self.bell()
         self.on_checkout_closed()
 
     def on_checkout_closed(self):
@@ -436,9 +1290,7 @@ class ItemLookupWindow(tk.Toplevel):
     def refresh(self):
         q = self.q.get().strip().lower()
         self.tree.delete(*self.tree.get_children())
-        for sku, item in ITEMS.items():
-            if q and q not in item['name'].lower():
-                continue
+        for sku, item in filter_items(q):
             self.tree.insert('', 'end', iid=sku, values=(sku, item['name'], f"{item['price']:.2f}"))
 
     def add_selected(self):
@@ -539,25 +1391,15 @@ class CheckoutWindow(tk.Toplevel):
 
         # write audit log
         try:
-            with open(TX_LOG, 'a', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    datetime.now().isoformat(timespec='seconds'),
-                    self.app.active_user_id,
-                    self.app.active_user.get('name'),
-                    payment_type,
-                    card_txn,
-                    f"{self.app.cart.subtotal():.2f}",
-                    f"{self.app.cart.tax():.2f}",
-                    f"{self.app.cart.total():.2f}",
-                    json.dumps(self.app.cart.lines)
-                ])
+            append_tx(self.app.active_user_id, self.app.active_user.get('name'),
+                      payment_type, card_txn, self.app.cart)
         except Exception as e:
             messagebox.showerror('Error', f'Failed to write audit log: {e}')
             return
+        went_low = INVENTORY.sell(self.app.cart.lines)
 
         messagebox.showinfo('Sale complete', 'Transaction recorded.')
-        self.on_done()
+        self.on_done(went_low)
         self.destroy()
 
 # --------------------- UI: Admin ---------------------
@@ -574,10 +1416,12 @@ class AdminWindow(tk.Toplevel):
         nb.pack(fill='both', expand=True)
 
         self.items_tab = ItemsAdmin(nb)
+        self.stock_tab = InventoryAdmin(nb, app)
         self.users_tab = UsersAdmin(nb)
         self.audit_tab = AuditAdmin(nb)
 
         nb.add(self.items_tab, text='Items (SKU)')
+        nb.add(self.stock_tab, text='Inventory')
         nb.add(self.users_tab, text='Users')
         nb.add(self.audit_tab, text='Audit / Export')
 
@@ -597,6 +1441,7 @@ class ItemsAdmin(ttk.Frame):
         ttk.Button(btns, text='Add', command=self.add_item).pack(side='left')
         ttk.Button(btns, text='Edit', command=self.edit_item).pack(side='left', padx=6)
         ttk.Button(btns, text='Delete', command=self.del_item).pack(side='left')
+        ttk.Button(btns, text='Barcodes…', command=self.add_barcode).pack(side='left', padx=6)
 
         self.refresh()
 
@@ -616,9 +1461,9 @@ class ItemsAdmin(ttk.Frame):
         if not name:
             return
         try:
-            price = float(simpledialog.askstring('Price', 'Price in dollars:'))
+            price = parse_price(simpledialog.askstring('Price', 'Price in dollars:'))
         except Exception:
-            messagebox.showerror('Invalid', 'Price must be a number')
+            messagebox.showerror('Invalid', 'Price must be a number of dollars and cents, e.g. 1.99')
             return
         ITEMS[sku] = {'name': name, 'price': price}
         save_json(ITEMS_FILE, ITEMS)
@@ -634,9 +1479,9 @@ class ItemsAdmin(ttk.Frame):
         if not name:
             return
         try:
-            price = float(simpledialog.askstring('Price', 'Price in dollars:', initialvalue=item['price']))
+            price = parse_price(simpledialog.askstring('Price', 'Price in dollars:', initialvalue=item['price']))
         except Exception:
-            messagebox.showerror('Invalid', 'Price must be a number')
+            messagebox.showerror('Invalid', 'Price must be a number of dollars and cents, e.g. 1.99')
             return
         ITEMS[sku] = {'name': name, 'price': price}
         save_json(ITEMS_FILE, ITEMS)
@@ -650,8 +1495,91 @@ class ItemsAdmin(ttk.Frame):
         if messagebox.askyesno('Delete', f'Delete SKU {sku}?'):
             ITEMS.pop(sku, None)
             save_json(ITEMS_FILE, ITEMS)
+            BARCODE_INDEX.remove_sku(sku)
             self.refresh()
 
+    def add_barcode(self):
+        sel = self.tree.selection()
+        if not sel:
+            return
+        sku = sel[0]
+        codes = ', '.join(BARCODE_INDEX.codes_for(sku)) or 'none'
+        code = simpledialog.askstring('Barcodes',
+            f"{ITEMS[sku]['name']}\nCurrent codes: {codes}\n\n"
+            "Scan or enter a UPC/EAN, PLU, or a sample deli/produce label:")
+        if not code:
+            return
+        try:
+            BARCODE_INDEX.add_alias(code, sku)
+        except ValueError as e:
+            messagebox.showerror('Invalid', str(e))
+
+# ---- Inventory Admin ----
+class InventoryAdmin(ttk.Frame):
+    def __init__(self, master, app: POSApp):
+        super().__init__(master)
+        self.app = app
+        self.tree = ttk.Treeview(self, columns=('name','on_hand','low'), show='headings')
+        self.tree.heading('name', text='Name')
+        self.tree.heading('on_hand', text='On hand')
+        self.tree.heading('low', text='Alert at')
+        self.tree.column('name', width=260)
+        self.tree.column('on_hand', width=90, anchor='e')
+        self.tree.column('low', width=90, anchor='e')
+        self.tree.pack(fill='both', expand=True, padx=8, pady=8)
+
+        btns = ttk.Frame(self)
+        btns.pack(fill='x', padx=8, pady=(0,8))
+        ttk.Button(btns, text='Receive', command=self.receive).pack(side='left')
+        ttk.Button(btns, text='Adjust Count', command=self.adjust).pack(side='left', padx=6)
+        ttk.Button(btns, text='Set Alert', command=self.set_low).pack(side='left')
+
+        self.refresh()
+
+    def refresh(self):
+        self.tree.delete(*self.tree.get_children())
+        for sku, item in ITEMS.items():
+            on_hand = INVENTORY.on_hand.get(sku)
+            self.tree.insert('', 'end', iid=sku, values=(
+                item['name'], '—' if on_hand is None else on_hand, INVENTORY.threshold(sku)))
+
+    def receive(self):
+        sel = self.tree.selection()
+        if not sel:
+            return
+        sku = sel[0]
+        qty = simpledialog.askinteger('Receive', f"Quantity received for {ITEMS[sku]['name']}:", minvalue=1)
+        if not qty:
+            return
+        note = simpledialog.askstring('Receive', 'Reference (invoice / PO #), optional:') or ''
+        INVENTORY.receive(sku, qty, self.app.active_user_id, note)
+        self.refresh()
+
+    def adjust(self):
+        sel = self.tree.selection()
+        if not sel:
+            return
+        sku = sel[0]
+        current = INVENTORY.on_hand.get(sku, 0)
+        counted = simpledialog.askinteger('Adjust', f"Counted on hand for {ITEMS[sku]['name']}:", initialvalue=current)
+        if counted is None:
+            return
+        note = simpledialog.askstring('Adjust', 'Reason (damage, count, ...), optional:') or ''
+        INVENTORY.adjust(sku, counted - current, self.app.active_user_id, note)
+        self.refresh()
+
+    def set_low(self):
+        sel = self.tree.selection()
+        if not sel:
+            return
+        sku = sel[0]
+        n = simpledialog.askinteger('Low stock alert', f"Alert when {ITEMS[sku]['name']} drops to:",
+                                    minvalue=0, initialvalue=INVENTORY.threshold(sku))
+        if n is None:
+            return
+        INVENTORY.set_low(sku, n)
+        self.refresh()
+
 # ---- Users Admin ----
 class UsersAdmin(ttk.Frame):
     def __init__(self, master):
@@ -735,24 +1663,25 @@ class AuditAdmin(ttk.Frame):
         )
         if not path:
             return
+        start = simpledialog.askstring('Date range', 'From date (YYYY-MM-DD), blank for all:')
+        if start is None:
+            return
+        end = simpledialog.askstring('Date range', 'To date (YYYY-MM-DD), blank for all:')
+        if end is None:
+            return
+        try:
+            for d in (start.strip(), end.strip()):
+                if d:
+                    datetime.strptime(d, '%Y-%m-%d')
+        except ValueError:
+            messagebox.showerror('Invalid', 'Dates must look like 2025-01-31')
+            return
 
-        out_lines = []
-        with open(TX_LOG, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                lines = json.loads(row['lines_json'])
-                out_lines.append('=' * 50)
-                out_lines.append("Time: {}".format(row['timestamp']))
-                out_lines.append("Cashier: {} ({})".format(row['cashier_name'], row['cashier_id']))
-                out_lines.append("Payment: {}  CardTxn: {}".format(row['payment_type'].upper(), row['card_txn']))
-                out_lines.append('Items:')
-                for l in lines:
-                    out_lines.append("  - {} x {} @ ${:.2f}".format(l['qty'], l['name'], l['price']))
-                out_lines.append("Subtotal: ${}  Tax: ${}  Total: ${}".format(row['subtotal'], row['tax'], row['total']))
-                out_lines.append('')
-
-        with open(path, 'w', encoding='utf-8') as out:
-            out.write("\n".join(out_lines))
+        try:
+            write_audit(path, start.strip() or None, end.strip() or None)
+        except Exception as e:
+            messagebox.showerror('Error', f'Failed to export audit: {e}')
+            return
 
         messagebox.showinfo('Saved', 'Audit text saved to:\n{}'.format(path))
 
@@ -769,8 +1698,18 @@ class AuditAdmin(ttk.Frame):
         if not path:
             return
 
-        with open(TX_LOG, 'r', encoding='utf-8') as src, open(path, 'w', encoding='utf-8') as dst:
-            dst.write(src.read())
+        # one CSV covering the sealed segments and the live log, with the
+        # lines spelled out as JSON so the copy reads without pos_item_names.csv
+        try:
+            with open(path, 'w', newline='', encoding='utf-8') as dst:
+                writer = csv.DictWriter(dst, fieldnames=TX_HEADER)
+                writer.writeheader()
+                for row in iter_tx_rows():
+                    row['lines_json'] = json.dumps(decode_lines(row['lines_json']))
+                    writer.writerow(row)
+        except Exception as e:
+            messagebox.showerror('Error', f'Failed to copy CSV log: {e}')
+            return
 
         messagebox.showinfo('Saved', 'CSV copy saved to:\n{}'.format(path))
 
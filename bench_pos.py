@@ -0,0 +1,330 @@
+# Benchmarks and a multi-lane load generator for EZ-POS.
+#
+# Runs headless (no Tk window is created) against a scratch data directory,
+# so it never touches the real pos_*.json / pos_transactions.csv files.
+#
+#   python bench_pos.py                          quick sizes
+#   python bench_pos.py --full                   1k/100k/1M SKUs, 10k..10M transactions
+#   python bench_pos.py --save base.json         record results
+#   python bench_pos.py --compare base.json      exit 1 if anything got slower (or bigger) than allowed
+#   python bench_pos.py load --lanes 8 --seconds 10
+#
+# See the README for details.
+
+import argparse
+import csv
+import importlib.util
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+QUICK_SKUS = [1000, 100000]
+QUICK_TXNS = [10000, 100000]
+FULL_SKUS = [1000, 100000, 1000000]
+FULL_TXNS = [10000, 100000, 1000000, 10000000]
+
+TX_CATALOG = 100000  # catalog behind the log benchmarks; far more SKUs than any cart pool
+
+WORDS = ['Water', 'Chips', 'Soda', 'Candy', 'Coffee', 'Bread', 'Milk', 'Gum', 'Jerky', 'Juice']
+
+# --------------------- setup ---------------------
+def load_pos(data_dir):
+    """Import EZ-POS.py with its data files redirected to data_dir."""
+    os.environ['EZPOS_DATA_DIR'] = data_dir
+    spec = importlib.util.spec_from_file_location('ezpos', os.path.join(HERE, 'EZ-POS.py'))
+    pos = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(pos)
+    return pos
+
+def make_catalog(pos, n):
+    """Fill ITEMS with n barcode SKUs, half EAN-13 and half UPC-A, and give
+    every 50th item a deli label (price or weight) saved in BARCODES_FILE.
+    Returns {sku: label prefix + item number} for the labelled items."""
+    pos.ITEMS.clear()
+    aliases, labels = {}, {}
+    for i in range(n):
+        body = f"400{i:09d}" if i % 2 == 0 else f"04{i:09d}"
+        sku = body + pos.gtin_check_digit(body)
+        pos.ITEMS[sku] = {'name': f"{WORDS[i % len(WORDS)]} #{i}", 'price': (i % 5000 + 99) / 100}
+        if i % 50 == 0 and len(labels) < 100000:
+            labels[sku] = ('21' if len(labels) % 2 == 0 else '23') + f"{len(labels) // 2:05d}"
+            aliases['label:' + labels[sku]] = sku
+    pos.save_json(pos.BARCODES_FILE, aliases)
+    pos.BARCODE_INDEX = pos.BarcodeIndex(aliases)
+    return labels
+
+def scan_codes(pos, labels, rng, count):
+    """Codes as the scanner would send them: GTIN SKUs as UPC-A, EAN-13 or
+    GTIN-14, and labelled items as a label with a random price or weight."""
+    skus = list(pos.ITEMS)
+    codes = []
+    for _ in range(count):
+        sku = rng.choice(skus)
+        if sku in labels:
+            body = labels[sku] + f"{rng.randint(1, 99999):05d}"
+        elif len(sku) == 12:
+            body = '0' + sku[:-1]         # UPC-A SKU scanned as EAN-13
+        else:
+            body = rng.choice(('', '0')) + sku[:-1]  # EAN-13 as is, or as GTIN-14
+        codes.append(body + pos.gtin_check_digit(body))
+    return codes
+
+def random_cart(pos, skus, rng, size):
+    cart = pos.Cart()
+    for sku in rng.sample(skus, size):
+        item = pos.ITEMS[sku]
+        cart.add(sku, item['name'], item['price'], qty=rng.randint(1, 3))
+    return cart
+
+def fill_log(pos, rows, rng):
+    """Write rows synthetic sales straight into TX_LOG and seal them into a
+    segment, as a day's rotation would (setup only, not timed)."""
+    skus = list(pos.ITEMS)
+    pool = []
+    for _ in range(1000):
+        cart = random_cart(pos, skus, rng, rng.randint(1, 8))
+        pool.append(['2025-01-01T12:00:00', '0001', 'Bench', 'cash', '',
+                     f"{cart.subtotal():.2f}", f"{cart.tax():.2f}", f"{cart.total():.2f}",
+                     pos.encode_lines(cart.lines)])
+    with open(pos.TX_LOG, 'a', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        for i in range(rows):
+            writer.writerow(pool[i % len(pool)])
+    pos.rotate_tx_log()
+
+def reset_log(pos):
+    shutil.rmtree(pos.TX_SEGMENT_DIR, ignore_errors=True)
+    if os.path.exists(pos.TX_MANIFEST):
+        os.remove(pos.TX_MANIFEST)
+    with open(pos.TX_LOG, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerow(pos.TX_HEADER)
+
+# --------------------- timing ---------------------
+def per_op(fn, number, repeat=3):
+    """Best-of-repeat seconds per call."""
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        took = (time.perf_counter() - t0) / number
+        best = took if best is None else min(best, took)
+    return best
+
+def label(n):
+    for size, suffix in ((1000000, 'M'), (1000, 'k')):
+        if n >= size and n % size == 0:
+            return f"{n // size}{suffix}"
+    return str(n)
+
+def fmt_result(name, value):
+    if 'bytes' in name:
+        return f"{value:9.1f} B "
+    return fmt_time(value)
+
+def fmt_time(sec):
+    if sec < 1e-3:
+        return f"{sec * 1e6:9.2f} us"
+    if sec < 1:
+        return f"{sec * 1e3:9.2f} ms"
+    return f"{sec:9.2f} s "
+
+# --------------------- benchmarks ---------------------
+def bench_catalog(pos, n, rng, results):
+    labels = make_catalog(pos, n)
+    skus = list(pos.ITEMS)
+    scans = scan_codes(pos, labels, rng, 1000)
+
+    def scan_and_add():
+        cart = pos.Cart()
+        for code in scans[:30]:
+            sku, price = pos.BARCODE_INDEX.resolve(code)
+            item = pos.ITEMS[sku]
+            cart.add(sku, item['name'], item['price'] if price is None else price)
+    results[f"cart_scan_30@{label(n)}"] = per_op(scan_and_add, 100)
+
+    cart = random_cart(pos, skus, rng, 30)
+    results[f"cart_total_30@{label(n)}"] = per_op(cart.total, 10000)
+
+    big = n >= 1000000
+    results[f"lookup_filter@{label(n)}"] = per_op(lambda: sum(1 for _ in pos.filter_items('water')), 1 if big else 5)
+    results[f"save_items@{label(n)}"] = per_op(lambda: pos.save_json(pos.ITEMS_FILE, pos.ITEMS), 1, 1 if big else 3)
+
+    # startup: load pos_items.json, then memory for the catalog plus the
+    # barcode index as the app builds them (held afterwards, and peak)
+    results[f"load_items@{label(n)}"] = per_op(lambda: pos.load_items(pos.ITEMS_FILE, {}), 1, 1 if big else 3)
+    pos.ITEMS = pos.BARCODE_INDEX = None
+    tracemalloc.start()
+    pos.ITEMS = pos.load_items(pos.ITEMS_FILE, {})
+    pos.BARCODE_INDEX = pos.BarcodeIndex(pos.load_json(pos.BARCODES_FILE, {}))
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    results[f"memory_bytes_per_sku@{label(n)}"] = held / n
+    results[f"load_peak_bytes_per_sku@{label(n)}"] = peak / n
+
+def bench_log(pos, rows, rng, results, scratch):
+    make_catalog(pos, TX_CATALOG)
+    reset_log(pos)
+    fill_log(pos, rows, rng)
+    # a fresh random cart per sale, so SKUs not yet in the name journal keep turning up
+    skus = list(pos.ITEMS)
+    carts = iter([random_cart(pos, skus, rng, 5) for _ in range(3000)])
+    results[f"tx_append@{label(rows)}"] = per_op(lambda: pos.append_tx('0001', 'Bench', 'cash', '', next(carts)), 1000)
+    out = os.path.join(scratch, 'audit.txt')
+    results[f"export_text@{label(rows)}"] = per_op(lambda: pos.write_audit(out), 1, 1 if rows >= 1000000 else 3)
+
+def run_bench(args, pos, scratch):
+    rng = random.Random(args.seed)
+    results = {}
+    for n in args.skus:
+        print(f"catalog {label(n)} SKUs ...", file=sys.stderr)
+        bench_catalog(pos, n, rng, results)
+    for rows in args.txns:
+        print(f"log {label(rows)} transactions ...", file=sys.stderr)
+        bench_log(pos, rows, rng, results, scratch)
+    for name, value in results.items():
+        print(f"{name:<28} {fmt_result(name, value)}")
+    return results
+
+# --------------------- load generator ---------------------
+def percentile(sorted_vals, q):
+    if not sorted_vals:
+        return 0.0
+    return sorted_vals[min(len(sorted_vals) - 1, int(q * len(sorted_vals)))]
+
+def _lane(n, args, data_dir, start, results):
+    """One cashier lane: its own process, data folder, catalog, log and inventory,
+    like a lane PC. Waits at start so every lane begins together."""
+    pos = load_pos(data_dir)
+    labels = make_catalog(pos, args.skus[0])
+    reset_log(pos)
+    for sku in list(pos.ITEMS)[:1000]:
+        pos.INVENTORY.on_hand[sku] = 1000000
+    rng = random.Random(args.seed + n)
+    codes = scan_codes(pos, labels, rng, 5000)
+    scans, checkouts = [], []
+    start.wait()
+    stop_at = time.perf_counter() + args.seconds
+    while time.perf_counter() < stop_at:
+        cart = pos.Cart()
+        for _ in range(rng.randint(1, args.basket)):
+            t0 = time.perf_counter()
+            sku, price = pos.BARCODE_INDEX.resolve(rng.choice(codes))
+            item = pos.ITEMS[sku]
+            cart.add(sku, item['name'], item['price'] if price is None else price)
+            scans.append(time.perf_counter() - t0)
+            if args.scan_gap:
+                time.sleep(args.scan_gap / 1000)
+        t0 = time.perf_counter()
+        pos.append_tx(f"{n:04d}", f"Lane {n}", 'cash', '', cart)
+        pos.INVENTORY.sell(cart.lines)
+        checkouts.append(time.perf_counter() - t0)
+    results.put((scans, checkouts))
+
+def run_load(args, scratch):
+    """Run args.lanes lanes at once, each a separate process, and report
+    throughput and scan / checkout latency across all of them."""
+    ctx = multiprocessing.get_context()
+    start = ctx.Barrier(args.lanes + 1)
+    results_q = ctx.Queue()
+    lanes = []
+    for n in range(1, args.lanes + 1):
+        data_dir = os.path.join(scratch, f"lane{n}")
+        os.makedirs(data_dir)
+        lanes.append(ctx.Process(target=_lane, args=(n, args, data_dir, start, results_q)))
+    for p in lanes:
+        p.start()
+    start.wait()
+    t0 = time.perf_counter()
+    scan_lat, checkout_lat = [], []
+    for _ in lanes:
+        scans, checkouts = results_q.get()
+        scan_lat.extend(scans)
+        checkout_lat.extend(checkouts)
+    elapsed = time.perf_counter() - t0
+    for p in lanes:
+        p.join()
+
+    scan_lat.sort()
+    checkout_lat.sort()
+    results = {
+        'load_scan_p50': percentile(scan_lat, 0.50),
+        'load_scan_p99': percentile(scan_lat, 0.99),
+        'load_checkout_p50': percentile(checkout_lat, 0.50),
+        'load_checkout_p99': percentile(checkout_lat, 0.99),
+    }
+    print(f"{args.lanes} lanes, {label(args.skus[0])} SKUs, {elapsed:.1f} s")
+    print(f"transactions: {len(checkout_lat)}  ({len(checkout_lat) / elapsed:.1f}/s)")
+    print(f"scans:        {len(scan_lat)}  ({len(scan_lat) / elapsed:.1f}/s)")
+    for name, sec in results.items():
+        print(f"{name:<28} {fmt_time(sec)}")
+    return results
+
+# --------------------- main ---------------------
+def compare(results, baseline_path, tolerance):
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    slower = []
+    for name, sec in results.items():
+        base = baseline.get(name)
+        if base and sec > base * (1 + tolerance):
+            slower.append(f"{name}: {fmt_result(name, base).strip()} -> {fmt_result(name, sec).strip()} ({sec / base:.2f}x)")
+    if slower:
+        print(f"\nSlower or bigger than {baseline_path} by more than {tolerance:.0%}:")
+        for s in slower:
+            print('  ' + s)
+        return 1
+    print(f"\nNo regressions against {baseline_path}.")
+    return 0
+
+def sizes(text):
+    return [int(float(x)) for x in text.split(',') if x]
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description='EZ-POS benchmarks and load generator')
+    ap.add_argument('mode', nargs='?', choices=['bench', 'load'], default='bench')
+    ap.add_argument('--full', action='store_true', help='run the full 1M SKU / 10M transaction sizes')
+    ap.add_argument('--skus', type=sizes, help='catalog sizes, e.g. 1000,100000')
+    ap.add_argument('--txns', type=sizes, help='transaction log sizes, e.g. 10000,1e6')
+    ap.add_argument('--lanes', type=int, default=8, help='load: concurrent cashiers')
+    ap.add_argument('--seconds', type=float, default=10, help='load: how long to run')
+    ap.add_argument('--basket', type=int, default=15, help='load: max items per sale')
+    ap.add_argument('--scan-gap', type=float, default=0, help='load: pause between scans (ms)')
+    ap.add_argument('--seed', type=int, default=445)
+    ap.add_argument('--save', help='write results as JSON')
+    ap.add_argument('--compare', help='baseline JSON from --save; exit 1 on regressions')
+    ap.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown vs baseline (0.25 = 25%%)')
+    args = ap.parse_args(argv)
+    if args.skus is None:
+        args.skus = FULL_SKUS if args.full else QUICK_SKUS
+        if args.mode == 'load':
+            args.skus = args.skus[-1:]
+    if args.txns is None:
+        args.txns = FULL_TXNS if args.full else QUICK_TXNS
+
+    scratch = tempfile.mkdtemp(prefix='ezpos-bench-')
+    try:
+        if args.mode == 'load':
+            results = run_load(args, scratch)
+        else:
+            results = run_bench(args, load_pos(scratch), scratch)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        return compare(results, args.compare, args.tolerance)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
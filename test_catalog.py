@@ -0,0 +1,169 @@
+# Checks for ItemCatalog and the streaming pos_items.json reader.
+#
+#   python -m unittest test_catalog
+#
+# Like bench_pos.py, EZ-POS.py is imported with its data files in a scratch
+# directory, so the real pos_* files are never touched.
+
+import importlib.util
+import io
+import json
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+pos = None
+scratch = None
+
+def setUpModule():
+    global pos, scratch
+    scratch = tempfile.mkdtemp(prefix='ezpos-test-')
+    os.environ['EZPOS_DATA_DIR'] = scratch
+    spec = importlib.util.spec_from_file_location('ezpos', os.path.join(HERE, 'EZ-POS.py'))
+    pos = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(pos)
+
+def tearDownModule():
+    shutil.rmtree(scratch, ignore_errors=True)
+
+def random_name(rng):
+    words = ['Water', 'chips', 'SODA', 'Café', 'Jalapeño', 'Gum', '牛乳', '', 'a|b', 'x"y\\z']
+    return ' '.join(rng.choice(words) for _ in range(rng.randint(1, 6)))
+
+class ItemCatalogTest(unittest.TestCase):
+    def check_same(self, cat, ref):
+        self.assertEqual(len(cat), len(ref))
+        self.assertEqual(list(cat), list(ref))      # insertion order, like a dict
+        self.assertEqual(dict(cat.items()), ref)
+        for sku in ref:
+            self.assertIn(sku, cat)
+        self.assertNotIn('no-such-sku', cat)
+
+    def test_random_ops_match_dict(self):
+        rng = random.Random(445)
+        cat, ref = pos.ItemCatalog(), {}
+        for step in range(40000):
+            op = rng.random()
+            if op < 0.45 or not ref:
+                sku = str(rng.randint(0, 5000))
+                item = {'name': random_name(rng), 'price': rng.randint(-500, 10**6) / 100}
+                cat[sku] = item
+                ref[sku] = item
+            elif op < 0.75:
+                sku = rng.choice(list(ref))
+                del cat[sku]
+                del ref[sku]
+            else:
+                # rename / reprice in place
+                sku = rng.choice(list(ref))
+                item = {'name': random_name(rng) * rng.randint(1, 20), 'price': ref[sku]['price']}
+                cat[sku] = item
+                ref[sku] = item
+            if step % 5000 == 0:
+                self.check_same(cat, ref)
+        self.check_same(cat, ref)
+        with self.assertRaises(KeyError):
+            del cat['no-such-sku']
+
+    def test_compaction_keeps_contents(self):
+        class Counting(pos.ItemCatalog):
+            compactions = 0
+            def _compact(self):
+                self.compactions += 1
+                super()._compact()
+
+        cat = Counting((str(i), {'name': f'Item {i}', 'price': i / 100}) for i in range(5000))
+        ref = dict(cat.items())
+        for i in range(5000):
+            if i % 4:
+                del cat[str(i)]
+                del ref[str(i)]
+        self.assertEqual(cat.compactions, 1)         # dead rows
+        self.check_same(cat, ref)
+        for n in range(3):
+            for sku in list(ref):
+                cat[sku] = ref[sku] = {'name': f'Renamed {n} ' * 10 + sku, 'price': 1.25}
+        self.assertGreater(cat.compactions, 1)       # unreferenced name bytes
+        self.check_same(cat, ref)
+
+    def test_find_matches_scan(self):
+        rng = random.Random(7)
+        cat = pos.ItemCatalog()
+        for i in range(3000):
+            cat[str(i)] = {'name': random_name(rng), 'price': 1}
+        for i in range(0, 3000, 3):
+            del cat[str(i)]
+        for i in range(1, 3000, 5):
+            cat[str(i)] = {'name': random_name(rng), 'price': 2}
+        for q in ['', 'water', 'soda', 'a', 'er c', 'café', '牛', 'a|b', 'x"y', 'nothing']:
+            expected = [(sku, item) for sku, item in cat.items() if q in item['name'].lower()]
+            self.assertEqual(list(cat.find(q)), expected, q)
+
+    def test_price_range(self):
+        cat = pos.ItemCatalog()
+        for bad in (2**31 / 100, float('nan')):
+            with self.assertRaises(ValueError):
+                cat['1'] = {'name': 'x', 'price': bad}
+        with self.assertRaises(OverflowError):
+            cat['1'] = {'name': 'x', 'price': float('inf')}
+        self.assertEqual(len(cat), 0)
+
+class JsonStreamTest(unittest.TestCase):
+    def test_dump_round_trip(self):
+        rng = random.Random(31)
+        cat = pos.ItemCatalog((str(rng.randint(0, 10**12)), {'name': random_name(rng), 'price': rng.randint(0, 10**7) / 100})
+                              for _ in range(500))
+        out = io.StringIO()
+        cat.dump(out)
+        text = out.getvalue()
+        ref = dict(cat.items())
+        self.assertEqual(json.loads(text), ref)
+        for chunk in (1, 2, 3, 7, 64, 1 << 20):
+            pairs = list(pos.iter_json_object(io.StringIO(text), chunk))
+            self.assertEqual(pairs, list(ref.items()), chunk)
+
+    def test_matches_json_loads(self):
+        docs = [
+            '{}', '  {  }  ', '{"a": 1}', '{"a":{"name":"x","price":1.5},"b":[1,{"c":null}]}\n',
+            '{"\\u00e9\\"": "caf\\u00e9", "k": "a,b}:{", "n": -1.5e3, "t": true}',
+            '\n{\n  "1": {\n    "name": "Bottle Water",\n    "price": 1.0\n  }\n}\n',
+        ]
+        for doc in docs:
+            for chunk in (1, 2, 5, 1 << 20):
+                self.assertEqual(dict(pos.iter_json_object(io.StringIO(doc), chunk)), json.loads(doc), doc)
+
+    def test_random_documents(self):
+        # numbers and literals split across chunk boundaries at every offset
+        rng = random.Random(99)
+        values = [0, -1, 1.5, -1.5e3, 2.25e-7, 10**15, True, False, None, 'x,}', [1, {'a': -2.0}]]
+        for _ in range(200):
+            doc = {str(i): rng.choice(values) for i in range(rng.randint(0, 8))}
+            text = json.dumps(doc, indent=rng.choice([None, 2]))
+            for chunk in (1, 2, 3, 4, 5):
+                self.assertEqual(dict(pos.iter_json_object(io.StringIO(text), chunk)), doc, text)
+
+    def test_rejects_bad_documents(self):
+        bad = ['', '   ', '[]', '"x"', '{', '{"a"', '{"a": 1', '{"a": 1,}', '{"a" 1}', '{1: 2}',
+               '{"a": 1} x', '{"a": 1}{}', '{"a": tru}', '{"a": 1 2}', '{"a": 1.5x}', '{"a": {"name": "x", "pri']
+        for doc in bad:
+            for chunk in (1, 3, 1 << 20):
+                with self.assertRaises(ValueError, msg=doc):
+                    list(pos.iter_json_object(io.StringIO(doc), chunk))
+
+    def test_load_items(self):
+        path = os.path.join(scratch, 'items_test.json')
+        with self.assertRaises(ValueError):
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('{"1": {"name": "ok", "price": 1}, "2": {"name": "bad", "price": null}}')
+            pos.load_items(path, pos.DEFAULT_ITEMS)
+        os.remove(path)
+        self.assertEqual(dict(pos.load_items(path, pos.DEFAULT_ITEMS).items()), pos.DEFAULT_ITEMS)
+        with open(path, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), pos.DEFAULT_ITEMS)
+
+if __name__ == '__main__':
+    unittest.main()